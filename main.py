@@ -1,6 +1,9 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from psycopg2.pool import ThreadedConnectionPool
 from starlette.middleware.sessions import SessionMiddleware
 
 from src.config import load_config
@@ -12,12 +15,26 @@ from src.sync_service import ActivitySyncService
 # Load and validate configuration
 config = load_config()
 
+# Shared connection pool for both databases. 10 connections are opened up
+# front and kept idle. getconn() raises PoolError instead of waiting once all
+# 40 are in use; every sync handler holds at most one connection, so 40 is
+# only enough while anyio's threadpool limit stays at its default of 40.
+db_pool = ThreadedConnectionPool(10, 40, config.DATABASE_URL)
+
 # Initialize database and sync service
-admin_db = AdminDatabase(config.DATABASE_URL)
-data_db = StravaDataDatabase(config.DATABASE_URL)
+admin_db = AdminDatabase(config.DATABASE_URL, pool=db_pool)
+data_db = StravaDataDatabase(config.DATABASE_URL, pool=db_pool)
 sync_service = ActivitySyncService(data_db, config)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close the pooled database connections when the app shuts down."""
+    yield
+    db_pool.closeall()
+
+
+app = FastAPI(lifespan=lifespan)
 templates = Jinja2Templates(directory="templates")
 
 # Mount static files
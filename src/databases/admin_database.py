@@ -1,14 +1,16 @@
 import psycopg2
 from contextlib import contextmanager
 from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
 from typing import Dict, List, Optional
 
 
 class AdminDatabase:
     """Database operations for admin settings, configurations, and date-based location filters."""
 
-    def __init__(self, db_url: str):
+    def __init__(self, db_url: str, pool: Optional[ThreadedConnectionPool] = None):
         self.db_url = db_url
+        self.pool = pool
         self.init_admin_tables()
 
     def init_admin_tables(self):
@@ -75,12 +77,24 @@ class AdminDatabase:
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = psycopg2.connect(self.db_url)
+        """Context manager for database connections.
+
+        Borrows from the shared pool when one was given, otherwise opens a
+        dedicated connection. Uncommitted work is rolled back either way.
+        """
+        if self.pool is None:
+            conn = psycopg2.connect(self.db_url)
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        conn = self.pool.getconn()
         try:
             yield conn
         finally:
-            conn.close()
+            self.pool.putconn(conn)
 
     # ===== SETTINGS MANAGEMENT =====
 
@@ -2,10 +2,11 @@ import json
 import math
 from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
 from src.databases.admin_database import AdminDatabase
 
@@ -13,8 +14,9 @@ from src.databases.admin_database import AdminDatabase
 class StravaDataDatabase:
     """Database operations for core Strava data: athletes, activities, and GPS filtering."""
 
-    def __init__(self, db_url: str):
+    def __init__(self, db_url: str, pool: Optional[ThreadedConnectionPool] = None):
         self.db_url = db_url
+        self.pool = pool
         self.init_data_tables()
 
     def init_data_tables(self):
@@ -88,12 +90,24 @@ class StravaDataDatabase:
 
     @contextmanager
     def get_connection(self):
-        """Context manager for database connections."""
-        conn = psycopg2.connect(self.db_url)
+        """Context manager for database connections.
+
+        Borrows from the shared pool when one was given, otherwise opens a
+        dedicated connection. Uncommitted work is rolled back either way.
+        """
+        if self.pool is None:
+            conn = psycopg2.connect(self.db_url)
+            try:
+                yield conn
+            finally:
+                conn.close()
+            return
+
+        conn = self.pool.getconn()
         try:
             yield conn
         finally:
-            conn.close()
+            self.pool.putconn(conn)
 
     # ===== GPS UTILITIES =====
 
@@ -218,40 +232,56 @@ class StravaDataDatabase:
                     }
                 return None
 
-    def get_latest_activity_date(self, athlete_id: str) -> Optional[datetime]:
-        """Get the date of the most recent activity for an athlete."""
+    def get_sync_context(
+        self, athlete_id: str, max_age_hours: int = 1
+    ) -> Tuple[bool, Optional[datetime]]:
+        """Get whether an athlete needs syncing and their latest activity date.
+
+        Both come from one query; the athlete needs syncing if their last sync
+        is missing or older than max_age_hours.
+        """
         with self.get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cursor:
                 cursor.execute(
                     """
-                    SELECT start_date FROM activities
-                    WHERE athlete_id = %s
-                    ORDER BY start_date DESC
-                    LIMIT 1
+                    SELECT
+                        (SELECT last_sync FROM athletes WHERE athlete_id = %s)
+                            AS last_sync,
+                        (SELECT MAX(start_date) FROM activities WHERE athlete_id = %s)
+                            AS latest_start_date
                 """,
-                    (athlete_id,),
+                    (athlete_id, athlete_id),
                 )
                 result = cursor.fetchone()
-                if result and result["start_date"]:
-                    try:
-                        # Parse the date string (handles both 'Z' and '+00:00' formats)
-                        date_str = result["start_date"]
-                        if date_str.endswith("Z"):
-                            date_str = date_str[:-1] + "+00:00"
-
-                        activity_date = datetime.fromisoformat(date_str)
-
-                        # Remove timezone info for consistency
-                        if activity_date.tzinfo is not None:
-                            activity_date = activity_date.replace(tzinfo=None)
-
-                        return activity_date
-                    except (ValueError, TypeError) as e:
-                        print(
-                            f"Warning: Could not parse latest activity date '{result['start_date']}': {e}"
-                        )
-                        return None
-                return None
+
+        last_sync = None
+        if result["last_sync"]:
+            last_sync = datetime.fromisoformat(str(result["last_sync"]))
+
+        latest_activity = None
+        if result["latest_start_date"]:
+            latest_activity = self._parse_start_date(result["latest_start_date"])
+
+        return self._is_stale(last_sync, max_age_hours), latest_activity
+
+    @staticmethod
+    def _parse_start_date(date_str: str) -> Optional[datetime]:
+        """Parse a stored activity start_date into a naive UTC datetime."""
+        try:
+            # Handles both 'Z' and '+00:00' formats
+            if date_str.endswith("Z"):
+                date_str = date_str[:-1] + "+00:00"
+
+            activity_date = datetime.fromisoformat(date_str)
+
+            # Remove timezone info for consistency
+            if activity_date.tzinfo is not None:
+                activity_date = activity_date.replace(tzinfo=None)
+
+            return activity_date
+        except (ValueError, TypeError) as e:
+            print(f"Warning: Could not parse latest activity date '{date_str}': {e}")
+            return None
 
     def get_all_athletes(self) -> List[Dict]:
         """Get all athletes for admin/stats purposes."""
@@ -265,9 +295,9 @@ class StravaDataDatabase:
                 """)
                 return [dict(row) for row in cursor.fetchall()]
 
-    def needs_sync(self, athlete_id: str, max_age_hours: int = 1) -> bool:
-        """Check if athlete data needs syncing based on last sync time."""
-        last_sync = self.get_athlete_last_sync(athlete_id)
+    @staticmethod
+    def _is_stale(last_sync: Optional[datetime], max_age_hours: int = 1) -> bool:
+        """Check whether a last sync timestamp is missing or too old."""
         if not last_sync:
             return True
 
@@ -325,7 +355,9 @@ class StravaDataDatabase:
         """
         stats = self.get_athlete_stats(athlete_id, admin_db)
         last_sync = self.get_athlete_last_sync(athlete_id)
-        needs_sync = self.needs_sync(athlete_id)
+        # Derive sync status from the timestamp already loaded instead of
+        # querying last_sync a second time
+        needs_sync = self._is_stale(last_sync)
 
         return {
             "athlete_id": athlete_id,
@@ -343,45 +375,58 @@ class StravaDataDatabase:
 
     def save_activities(self, athlete_id: str, activities: List[Dict]) -> int:
         """Save activities to database, avoiding duplicates."""
-        saved_count = 0
+        rows = [
+            (
+                activity["id"],
+                athlete_id,
+                activity.get("name", ""),
+                activity.get("type", ""),
+                activity.get("start_date", ""),
+                activity.get("distance", 0),
+                activity.get("moving_time", 0),
+                activity.get("elapsed_time", 0),
+                activity.get("total_elevation_gain", 0),
+                activity.get("average_speed", 0),
+                activity.get("max_speed", 0),
+                json.dumps(activity),  # Store full data as JSON
+            )
+            for activity in activities
+        ]
+
+        if not rows:
+            return 0
+
         with self.get_connection() as conn:
             with conn.cursor() as cursor:
-                for activity in activities:
-                    # Check if activity already exists
-                    cursor.execute(
-                        "SELECT 1 FROM activities WHERE activity_id = %s",
-                        (activity["id"],),
-                    )
-                    if cursor.fetchone():
-                        continue  # Skip existing activities
-
-                    # Insert new activity
-                    cursor.execute(
-                        """
-                        INSERT INTO activities (
-                            activity_id, athlete_id, name, type, start_date,
-                            distance, moving_time, elapsed_time, total_elevation_gain,
-                            average_speed, max_speed, raw_data
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """,
-                        (
-                            activity["id"],
-                            athlete_id,
-                            activity.get("name", ""),
-                            activity.get("type", ""),
-                            activity.get("start_date", ""),
-                            activity.get("distance", 0),
-                            activity.get("moving_time", 0),
-                            activity.get("elapsed_time", 0),
-                            activity.get("total_elevation_gain", 0),
-                            activity.get("average_speed", 0),
-                            activity.get("max_speed", 0),
-                            json.dumps(activity),  # Store full data as JSON
-                        ),
-                    )
-                    saved_count += 1
+                # One multi-row INSERT; existing activities are skipped by
+                # the database and only new ones come back from RETURNING
+                inserted = execute_values(
+                    cursor,
+                    """
+                    INSERT INTO activities (
+                        activity_id, athlete_id, name, type, start_date,
+                        distance, moving_time, elapsed_time, total_elevation_gain,
+                        average_speed, max_speed, raw_data
+                    ) VALUES %s
+                    ON CONFLICT (activity_id) DO NOTHING
+                    RETURNING activity_id
+                """,
+                    rows,
+                    page_size=500,
+                    fetch=True,
+                )
+                conn.commit()
+
+        return len(inserted)
+
+    def mark_athlete_synced(self, athlete_id: str) -> None:
+        """Update an athlete's total activity count and last sync time.
 
-                # Update athlete's total activity count and last sync
+        Call once after all activities of a sync have been saved, so a sync
+        that fails halfway doesn't count as fresh.
+        """
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
                 cursor.execute(
                     """
                     UPDATE athletes
@@ -392,11 +437,8 @@ class StravaDataDatabase:
                 """,
                     (athlete_id, athlete_id),
                 )
-
                 conn.commit()
 
-        return saved_count
-
     def get_activities(self, athlete_id: str, limit: int = None) -> List[Dict]:
         """Get activities for an athlete from database."""
         with self.get_connection() as conn:
@@ -424,6 +466,16 @@ class StravaDataDatabase:
 
                 return activities
 
+    def count_activities(self, athlete_id: str) -> int:
+        """Count stored activities for an athlete."""
+        with self.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COUNT(*) FROM activities WHERE athlete_id = %s",
+                    (athlete_id,),
+                )
+                return cursor.fetchone()[0]
+
     # ===== ACTIVITY FILTERING =====
 
     def _apply_location_filter(
@@ -524,54 +576,57 @@ class StravaDataDatabase:
                     params.append(limit)
 
                 cursor.execute(query, params)
-                activities = []
+                rows = cursor.fetchall()
+
+        # Location filtering queries admin_db, so the connection is released
+        # first instead of holding two connections per request
+        activities = []
+        for row in rows:
+            activity = dict(row)
+
+            # Start with basic activity data
+            filtered_activity = {
+                "activity_id": activity["activity_id"],
+                "athlete_id": activity["athlete_id"],
+                "name": activity["name"],
+                "type": activity["type"],
+                "start_date": activity["start_date"],
+                "distance": activity["distance"],
+                "moving_time": activity["moving_time"],
+            }
+
+            # Parse and extract relevant fields from raw_data
+            if activity["raw_data"]:
+                try:
+                    raw_data = json.loads(activity["raw_data"])
+
+                    # Extract specific fields from raw_data
+                    extracted_fields = {
+                        "start_latlng": raw_data.get("start_latlng"),
+                        "end_latlng": raw_data.get("end_latlng"),
+                        "athlete_count": raw_data.get("athlete_count"),
+                        "photo_count": raw_data.get("photo_count"),
+                        "kudos_count": raw_data.get("kudos_count"),
+                        "comment_count": raw_data.get("comment_count"),
+                        "has_kudos": raw_data.get("has_kudos"),
+                        "pr_count": raw_data.get("pr_count"),
+                    }
 
-                for row in cursor.fetchall():
-                    activity = dict(row)
+                    # Add extracted fields to activity
+                    filtered_activity.update(extracted_fields)
 
-                    # Start with basic activity data
-                    filtered_activity = {
-                        "activity_id": activity["activity_id"],
-                        "athlete_id": activity["athlete_id"],
-                        "name": activity["name"],
-                        "type": activity["type"],
-                        "start_date": activity["start_date"],
-                        "distance": activity["distance"],
-                        "moving_time": activity["moving_time"],
-                    }
+                    # Apply location filtering if admin_db is provided
+                    if admin_db:
+                        self._apply_location_filter(
+                            filtered_activity, raw_data, admin_db
+                        )
+
+                except (json.JSONDecodeError, TypeError) as e:
+                    # If JSON parsing fails, continue without extracted fields
+                    print(
+                        f"Warning: Could not parse raw_data for activity {activity['activity_id']}: {e}"
+                    )
+
+            activities.append(filtered_activity)
 
-                    # Parse and extract relevant fields from raw_data
-                    if activity["raw_data"]:
-                        try:
-                            raw_data = json.loads(activity["raw_data"])
-
-                            # Extract specific fields from raw_data
-                            extracted_fields = {
-                                "start_latlng": raw_data.get("start_latlng"),
-                                "end_latlng": raw_data.get("end_latlng"),
-                                "athlete_count": raw_data.get("athlete_count"),
-                                "photo_count": raw_data.get("photo_count"),
-                                "kudos_count": raw_data.get("kudos_count"),
-                                "comment_count": raw_data.get("comment_count"),
-                                "has_kudos": raw_data.get("has_kudos"),
-                                "pr_count": raw_data.get("pr_count"),
-                            }
-
-                            # Add extracted fields to activity
-                            filtered_activity.update(extracted_fields)
-
-                            # Apply location filtering if admin_db is provided
-                            if admin_db:
-                                self._apply_location_filter(
-                                    filtered_activity, raw_data, admin_db
-                                )
-
-                        except (json.JSONDecodeError, TypeError) as e:
-                            # If JSON parsing fails, continue without extracted fields
-                            print(
-                                f"Warning: Could not parse raw_data for activity {activity['activity_id']}: {e}"
-                            )
-
-                    activities.append(filtered_activity)
-
-            return activities
+        return activities
@@ -5,6 +5,7 @@ Admin routes: admin dashboard, settings, date filters
 from datetime import datetime
 
 from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
@@ -22,7 +23,7 @@ def setup_admin_routes(
     """Setup admin routes"""
 
     @app.get("/admin")
-    async def admin_dashboard(request: Request):
+    def admin_dashboard(request: Request):
         """Admin dashboard showing all athletes (for development)."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -57,7 +58,7 @@ def setup_admin_routes(
         )
 
     @app.get("/admin/date-filters")
-    async def admin_date_filters(request: Request):
+    def admin_date_filters(request: Request):
         """Admin page for managing date-based location filters."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -99,8 +100,13 @@ def setup_admin_routes(
             if not (0.1 <= radius_km <= 50):
                 raise ValueError("Radius must be between 0.1 and 50 km")
 
-            admin_db.add_date_location_filter(
-                filter_date, latitude, longitude, radius_km, description
+            await run_in_threadpool(
+                admin_db.add_date_location_filter,
+                filter_date,
+                latitude,
+                longitude,
+                radius_km,
+                description,
             )
 
             return HTMLResponse(f"""
@@ -120,7 +126,7 @@ def setup_admin_routes(
             """)
 
     @app.post("/admin/date-filters/delete/{filter_date}")
-    async def delete_date_filter(request: Request, filter_date: str):
+    def delete_date_filter(request: Request, filter_date: str):
         """Delete a date-based location filter."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -139,7 +145,7 @@ def setup_admin_routes(
             """)
 
     @app.get("/api/date-filters")
-    async def get_date_filters(request: Request):
+    def get_date_filters(request: Request):
         """API endpoint to get all date-based location filters."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -147,7 +153,7 @@ def setup_admin_routes(
         return admin_db.get_all_date_location_filters()
 
     @app.get("/admin/settings")
-    async def admin_settings(request: Request):
+    def admin_settings(request: Request):
         """Admin page for managing general settings."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -182,8 +188,8 @@ def setup_admin_routes(
             if not (1 <= threshold <= 100):
                 raise ValueError("Discount threshold must be between 1 and 100")
 
-            admin_db.update_activity_filter_days(days)
-            admin_db.update_discount_threshold(threshold)
+            await run_in_threadpool(admin_db.update_activity_filter_days, days)
+            await run_in_threadpool(admin_db.update_discount_threshold, threshold)
 
             return HTMLResponse(f"""
                 <h3>✅ Settings updated successfully!</h3>
@@ -200,7 +206,7 @@ def setup_admin_routes(
             """)
 
     @app.get("/admin/discounts")
-    async def admin_discounts(request: Request):
+    def admin_discounts(request: Request):
         """Admin page for managing discounts."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -234,7 +240,7 @@ def setup_admin_routes(
             if not code:
                 raise ValueError("Code is required")
 
-            admin_db.add_discount(title, description, code)
+            await run_in_threadpool(admin_db.add_discount, title, description, code)
 
             return HTMLResponse(f"""
                 <h3>✅ Discount added successfully!</h3>
@@ -251,7 +257,7 @@ def setup_admin_routes(
             """)
 
     @app.post("/admin/discounts/delete/{discount_id}")
-    async def delete_discount(request: Request, discount_id: int):
+    def delete_discount(request: Request, discount_id: int):
         """Delete a discount."""
         if auth_response := require_admin(request, config):
             return auth_response
@@ -270,7 +276,7 @@ def setup_admin_routes(
             """)
 
     @app.post("/admin/discounts/toggle/{discount_id}")
-    async def toggle_discount(request: Request, discount_id: int):
+    def toggle_discount(request: Request, discount_id: int):
         """Toggle the active status of a discount."""
         if auth_response := require_admin(request, config):
             return auth_response
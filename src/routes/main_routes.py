@@ -2,7 +2,7 @@
 Non-admin routes: login, index, callback, logout, sync_activities, download_csv, stats
 """
 
-from fastapi import FastAPI, Request
+from fastapi import BackgroundTasks, FastAPI, Request
 from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 
@@ -25,7 +25,7 @@ def setup_main_routes(
     """Setup main application routes (non-admin)"""
 
     @app.get("/", response_class=HTMLResponse)
-    async def index(request: Request):
+    def index(request: Request):
         athlete_id = request.session.get("athlete_id")
 
         if athlete_id:
@@ -79,7 +79,7 @@ def setup_main_routes(
         return RedirectResponse(auth_url)
 
     @app.get("/auth/strava/callback")
-    async def callback(request: Request, code: str):
+    def callback(request: Request, code: str, background_tasks: BackgroundTasks):
         client = StravaClient(config.STRAVA_CLIENT_ID, config.STRAVA_CLIENT_SECRET)
         athlete_id = client.exchange_code_for_tokens(code)
 
@@ -99,12 +99,13 @@ def setup_main_routes(
             athlete_id, client.access_token, client.refresh_token, client.expires_at
         )
 
-        # Smart sync: only sync if needed
-        try:
-            sync_service.sync_athlete_activities(athlete_id, client)
-        except Exception:
-            # Don't fail the login if sync fails
-            pass
+        # Smart sync: only sync if needed. Runs after the redirect is sent so
+        # the login doesn't wait on the Strava API; sync errors are captured
+        # in the sync result and never fail the login.
+        background_tasks.add_task(
+            sync_service.sync_athlete_activities, athlete_id, client
+        )
+        background_tasks.add_task(client.close)
 
         return RedirectResponse("/")
 
@@ -114,7 +115,7 @@ def setup_main_routes(
         return RedirectResponse("/")
 
     @app.get("/discounts")
-    async def discounts(request: Request):
+    def discounts(request: Request):
         """Discounts and rewards page for active athletes."""
         athlete_id = request.session.get("athlete_id")
         if not athlete_id:
@@ -137,7 +138,7 @@ def setup_main_routes(
         )
 
     @app.get("/sync")
-    async def sync_activities(request: Request):
+    def sync_activities(request: Request):
         """Manually trigger sync for the logged-in athlete."""
         athlete_id = request.session.get("athlete_id")
         if not athlete_id:
@@ -157,7 +158,7 @@ def setup_main_routes(
         )
 
     @app.get("/download")
-    async def download_csv(request: Request):
+    def download_csv(request: Request):
         """Export activities as CSV for the logged-in athlete."""
         athlete_id = request.session.get("athlete_id")
         if not athlete_id:
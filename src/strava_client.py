@@ -1,8 +1,81 @@
+import threading
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def _to_epoch(dt: datetime) -> int:
+    """Convert a datetime to epoch seconds, treating naive values as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+class TokenBucket:
+    """Thread-safe token bucket for Strava's 100 requests / 15 minutes limit.
+
+    The refill rate adapts AIMD-style: it is halved whenever Strava throttles
+    us and grows back in small steps on each successful request.
+    """
+
+    def __init__(self, capacity: int = 100, refill_seconds: float = 900.0):
+        self.capacity = capacity
+        self.max_rate = capacity / refill_seconds  # tokens per second
+        self.min_rate = self.max_rate / 8
+        self.rate = self.max_rate
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.last_refill) * self.rate
+        )
+        self.last_refill = now
+
+    def acquire(self, n: int = 1) -> None:
+        """Take n tokens, sleeping until they are available.
+
+        Tokens may go negative: each waiting caller reserves its share so
+        concurrent callers queue up instead of all waking at the same time.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= n
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            print(f"Rate limit budget used up. Sleeping {wait:.1f} seconds...")
+            time.sleep(wait)
+
+    def backoff(self) -> None:
+        """Halve the refill rate after a 429 or 5xx (multiplicative decrease)."""
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * 0.5)
+
+    def recover(self) -> None:
+        """Raise the refill rate one step after a success (additive increase)."""
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+    def set_remaining(self, remaining: int) -> None:
+        """Sync the bucket with the remaining requests reported by Strava.
+
+        Only ever lowers the balance: a negative balance holds the reservations
+        of callers already waiting in acquire(), and overwriting it would wake
+        them all at once.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, float(min(self.capacity, remaining)))
 
 
 class StravaClient:
@@ -10,6 +83,12 @@ class StravaClient:
     TOKEN_URL = "https://www.strava.com/oauth/token"
     AUTH_URL = "https://www.strava.com/oauth/authorize"
     REDIRECT_URI = "http://localhost"
+    SERVER_ERROR_RETRIES = 3
+
+    # Strava rate limits apply per application, so all clients sharing a
+    # client_id share one bucket
+    _rate_limiters: Dict[str, TokenBucket] = {}
+    _rate_limiters_lock = threading.Lock()
 
     def __init__(self, client_id: str, client_secret: str):
         self.client_id = client_id
@@ -17,6 +96,46 @@ class StravaClient:
         self.access_token: Optional[str] = None
         self.refresh_token: Optional[str] = None
         self.expires_at: Optional[int] = None
+        self._known_valid_until: float = 0
+        # Clients are created on threadpool threads; the lock keeps two of
+        # them from each registering their own bucket for the same app
+        with self._rate_limiters_lock:
+            if client_id not in self._rate_limiters:
+                self._rate_limiters[client_id] = TokenBucket()
+            self._bucket = self._rate_limiters[client_id]
+
+        # Reuse TCP/TLS connections to strava.com across token refreshes and pages.
+        # The adapter retries failed connections and 5xx on token POSTs only.
+        # Activity GETs come back on the first 5xx or 429 (Retry-After is not
+        # honoured here) so _get_activities_page retries them through the
+        # rate limiter, one bucket token and backoff per real request.
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods={"POST"},
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self._session = requests.Session()
+        self._session.mount(
+            "https://",
+            HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry),
+        )
+
+    def close(self) -> None:
+        """Close pooled HTTP connections."""
+        self._session.close()
+
+    def set_tokens(
+        self, access_token: str, refresh_token: str, expires_at: Optional[int]
+    ) -> None:
+        """Store OAuth tokens and remember how long the access token is usable."""
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+        # Treat the token as expired a minute early so it can't lapse mid-sync
+        self._known_valid_until = expires_at - 60 if expires_at else float("inf")
 
     def refresh_access_token(self) -> bool:
         """Refresh the access token using the refresh token."""
@@ -31,13 +150,16 @@ class StravaClient:
             "grant_type": "refresh_token",
         }
 
-        response = requests.post(self.TOKEN_URL, data=payload)
+        response = self._session.post(self.TOKEN_URL, data=payload, timeout=15)
 
         if response.status_code == 200:
-            token_data = response.json()
-            self.access_token = token_data["access_token"]
-            self.expires_at = token_data["expires_at"]
-            self.refresh_token = token_data["refresh_token"]  # Update refresh token
+            token_data = orjson.loads(response.content)
+            # Strava rotates the refresh token on every refresh
+            self.set_tokens(
+                token_data["access_token"],
+                token_data["refresh_token"],
+                token_data["expires_at"],
+            )
             print("✓ Access token refreshed successfully")
             return True
         else:
@@ -45,14 +167,8 @@ class StravaClient:
             return False
 
     def is_token_valid(self) -> bool:
-        """Check if the current access token is valid and not expired."""
-        if not self.access_token:
-            return False
-
-        if self.expires_at and time.time() > self.expires_at:
-            return False
-
-        return True
+        """Check if the current access token is valid and not about to expire."""
+        return self.access_token is not None and time.time() < self._known_valid_until
 
     def ensure_valid_token(self) -> bool:
         """Ensure we have a valid access token, refresh if needed."""
@@ -69,73 +185,142 @@ class StravaClient:
         per_page: int = 200,
         page: int = 1,
     ) -> List[Dict]:
-        """Fetch a single page of activities."""
-        # Ensure we have a valid token
-        if not self.ensure_valid_token():
-            raise Exception("Failed to obtain valid access token")
+        """Fetch a single page of activities.
+
+        The token is not checked up front; an invalid token is refreshed on 401.
+        """
+        return self._get_activities_page(
+            before_ts=_to_epoch(before) if before else None,
+            after_ts=_to_epoch(after) if after else None,
+            per_page=per_page,
+            page=page,
+        )
 
-        headers = {"Authorization": f"Bearer {self.access_token}"}
+    def _get_activities_page(
+        self,
+        before_ts: Optional[int],
+        after_ts: Optional[int],
+        per_page: int,
+        page: int,
+    ) -> List[Dict]:
+        """Fetch a single page of activities bounded by epoch-second timestamps."""
         params = {"per_page": per_page, "page": page}
 
-        if before:
-            params["before"] = int(before.timestamp())
-        if after:
-            params["after"] = int(after.timestamp())
+        if before_ts is not None:
+            params["before"] = before_ts
+        if after_ts is not None:
+            params["after"] = after_ts
+
+        refreshed = False
+        server_errors = 0
+        while True:
+            resp = self._request_activities(params)
 
-        resp = requests.get(
+            # Handle authentication errors (401) - refresh once and retry
+            if resp.status_code == 401 and not refreshed:
+                print("Token invalid, attempting to refresh...")
+                if not self.refresh_access_token():
+                    raise Exception("Failed to refresh access token")
+                refreshed = True
+                continue
+
+            # Handle rate limiting (429) - wait as instructed and retry
+            if resp.status_code == 429:
+                retry_after = int(resp.headers.get("Retry-After", "15"))
+                print(f"Rate limited. Sleeping {retry_after} seconds...")
+                time.sleep(retry_after)
+                continue
+
+            # Retry transient server errors (5xx) a few times with exponential backoff
+            if resp.status_code >= 500 and server_errors < self.SERVER_ERROR_RETRIES:
+                server_errors += 1
+                delay = 0.5 * 2 ** (server_errors - 1)
+                print(f"Strava returned {resp.status_code}. Retrying in {delay} seconds...")
+                time.sleep(delay)
+                continue
+
+            break
+
+        resp.raise_for_status()
+        return orjson.loads(resp.content)
+
+    def _request_activities(self, params: Dict) -> requests.Response:
+        """GET one page of activities within the shared rate limit budget."""
+        self._bucket.acquire()
+        resp = self._session.get(
             f"{self.BASE_URL}/athlete/activities",
-            headers=headers,
+            headers={"Authorization": f"Bearer {self.access_token}"},
             params=params,
             timeout=30,
         )
+        self._update_rate_limit(resp)
 
-        # Handle authentication errors (401)
-        if resp.status_code == 401:
-            print("Token invalid, attempting to refresh...")
-            if self.refresh_access_token():
-                # Retry with new token
-                headers = {"Authorization": f"Bearer {self.access_token}"}
-                resp = requests.get(
-                    f"{self.BASE_URL}/athlete/activities",
-                    headers=headers,
-                    params=params,
-                    timeout=30,
-                )
-            else:
-                raise Exception("Failed to refresh access token")
-
-        # Handle rate limiting (429)
-        if resp.status_code == 429:
-            retry_after = int(resp.headers.get("Retry-After", "15"))
-            print(f"Rate limited. Sleeping {retry_after} seconds...")
-            time.sleep(retry_after)
-            return self.get_activities(before, after, per_page, page)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            self._bucket.backoff()
+        elif resp.ok:
+            self._bucket.recover()
 
-        resp.raise_for_status()
-        return resp.json()
+        return resp
 
-    def get_all_activities(
+    def _update_rate_limit(self, resp: requests.Response) -> None:
+        """Sync the rate limit budget with Strava's X-RateLimit headers.
+
+        Headers hold "15-minute,daily" pairs, e.g. Limit "100,1000", Usage "27,300".
+        """
+        usage = resp.headers.get("X-RateLimit-Usage")
+        limit = resp.headers.get("X-RateLimit-Limit")
+        if not usage or not limit:
+            return
+
+        try:
+            used_short, used_daily = (int(v) for v in usage.split(",")[:2])
+            limit_short, limit_daily = (int(v) for v in limit.split(",")[:2])
+        except ValueError:
+            return
+
+        # Hold back 10% of the 15-minute window so the bucket starts pacing
+        # requests at 90% usage instead of running into a 429
+        reserve = limit_short // 10
+        self._bucket.set_remaining(limit_short - used_short - reserve)
+
+        # Close to the daily cap there is no window reset to wait for soon,
+        # so spread the remaining requests out
+        if used_daily > 0.9 * limit_daily:
+            self._bucket.backoff()
+
+    def iter_activity_pages(
         self, after: Optional[datetime] = None, before: Optional[datetime] = None
-    ) -> List[Dict]:
-        """Get all activities with pagination."""
-        all_activities = []
+    ) -> Iterator[List[Dict]]:
+        """Yield activities one page at a time, skipping empty pages."""
+        # Check the token once for the whole batch rather than per page
+        if not self.ensure_valid_token():
+            raise Exception("Failed to obtain valid access token")
+
+        # Convert the bounds once; they are the same for every page
+        before_ts = _to_epoch(before) if before else None
+        after_ts = _to_epoch(after) if after else None
         page = 1
+        per_page = 200
 
         while True:
-            activities = self.get_activities(
-                before=before, after=after, per_page=200, page=page
-            )
-            if not activities:
+            activities = self._get_activities_page(before_ts, after_ts, per_page, page)
+            print(f"Fetched page {page}: {len(activities)} activities")
+            if activities:
+                yield activities
+
+            # A short page is the last one - don't spend a request on an empty page
+            if len(activities) < per_page:
                 break
 
-            all_activities.extend(activities)
-            print(f"Fetched page {page}: {len(activities)} activities")
             page += 1
 
-            # Strava limit: 100 requests per 15 min → ~1 request every 9s max
-            # We keep it low with 0.2s since each request fetches 200 activities
-            time.sleep(0.2)
-
+    def get_all_activities(
+        self, after: Optional[datetime] = None, before: Optional[datetime] = None
+    ) -> List[Dict]:
+        """Get all activities with pagination."""
+        all_activities = []
+        for activities in self.iter_activity_pages(after=after, before=before):
+            all_activities.extend(activities)
         return all_activities
 
     def exchange_code_for_tokens(self, code: str) -> Optional[str]:
@@ -148,19 +333,21 @@ class StravaClient:
         }
 
         try:
-            response = requests.post(self.TOKEN_URL, data=payload)
+            response = self._session.post(self.TOKEN_URL, data=payload, timeout=15)
             response.raise_for_status()
-            token_data = response.json()
+            token_data = orjson.loads(response.content)
 
             # Store tokens
-            self.access_token = token_data["access_token"]
-            self.refresh_token = token_data["refresh_token"]
-            self.expires_at = token_data["expires_at"]
+            self.set_tokens(
+                token_data["access_token"],
+                token_data["refresh_token"],
+                token_data["expires_at"],
+            )
 
             # Get athlete ID (unique per user)
             athlete_id = token_data["athlete"]["id"]
             print(f"✓ Tokens obtained for athlete {athlete_id}")
             return str(athlete_id)  # Return as string for consistency
-        except Exception as e:
+        except (requests.RequestException, KeyError, orjson.JSONDecodeError) as e:
             print(f"Error exchanging code for tokens: {e}")
             return None
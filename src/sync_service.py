@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from src.config import Config
@@ -17,21 +17,20 @@ class ActivitySyncService:
         self.db = db
         self.config = config
 
-    def should_sync(self, athlete_id: str) -> bool:
-        """Determine if we should sync activities for this athlete."""
-        return self.db.needs_sync(athlete_id, max_age_hours=1)
-
-    def get_sync_start_date(self, athlete_id: str) -> Optional[datetime]:
-        """Get the date from which to start syncing activities."""
-        # Check the latest activity date
-        latest_activity = self.db.get_latest_activity_date(athlete_id)
+    def get_sync_start_date(self, latest_activity: Optional[datetime]) -> datetime:
+        """Get the date from which to start syncing activities.
 
+        Takes the athlete's latest stored activity date (None if there is
+        none yet). Dates are naive UTC, matching stored activity start dates
+        and the epoch timestamps Strava expects.
+        """
         if latest_activity:
             # Start from latest activity date to catch any updates
             return latest_activity - timedelta(days=1)  # Small overlap to catch updates
         else:
             # First time sync - go back six months from now
-            return datetime.now() - timedelta(days=180)
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            return now - timedelta(days=180)
 
     def sync_athlete_activities(self, athlete_id: str, client: StravaClient) -> dict:
         """Sync activities for a specific athlete."""
@@ -44,9 +43,13 @@ class ActivitySyncService:
         }
 
         try:
-            # Check if sync is needed
-            if not self.should_sync(athlete_id):
-                existing_count = len(self.db.get_activities(athlete_id, limit=1))
+            # Check if sync is needed, fetching the latest activity date in
+            # the same query
+            needs_sync, latest_activity = self.db.get_sync_context(
+                athlete_id, max_age_hours=1
+            )
+            if not needs_sync:
+                existing_count = self.db.count_activities(athlete_id)
                 result.update(
                     {
                         "synced": False,
@@ -58,15 +61,17 @@ class ActivitySyncService:
                 return result
 
             # Get the appropriate start date for syncing
-            sync_from_date = self.get_sync_start_date(athlete_id)
+            sync_from_date = self.get_sync_start_date(latest_activity)
             print(f"Syncing activities for athlete {athlete_id} from {sync_from_date}")
 
-            # Fetch activities from Strava
-            activities = client.get_all_activities(after=sync_from_date)
+            # Save each page as it arrives so only one page is held in memory
+            new_count = 0
+            for page in client.iter_activity_pages(after=sync_from_date):
+                new_count += self.db.save_activities(athlete_id, page)
 
-            # Save to database
-            new_count = self.db.save_activities(athlete_id, activities)
-            total_count = len(self.db.get_activities(athlete_id))
+            # Only a sync that fetched every page updates last_sync
+            self.db.mark_athlete_synced(athlete_id)
+            total_count = self.db.count_activities(athlete_id)
 
             # Save potentially refreshed tokens back to database
             self.db.save_athlete_tokens(
@@ -108,8 +113,13 @@ class ActivitySyncService:
         )
 
         # Load the stored tokens
-        client.access_token = token_data["access_token"]
-        client.refresh_token = token_data["refresh_token"]
-        client.expires_at = token_data["expires_at"]
+        client.set_tokens(
+            token_data["access_token"],
+            token_data["refresh_token"],
+            token_data["expires_at"],
+        )
 
-        return self.sync_athlete_activities(athlete_id, client)
+        try:
+            return self.sync_athlete_activities(athlete_id, client)
+        finally:
+            client.close()
@@ -1,21 +1,91 @@
 """Shared test fixtures and configuration for integration tests."""
 
-import json
+import hashlib
+import inspect
+import os
+from types import MappingProxyType
+from urllib.parse import urlsplit
 import pytest
 import psycopg2
-from datetime import datetime, timedelta
-from unittest.mock import Mock
+from psycopg2 import sql
+from psycopg2.extras import Json, execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 from src.config import Config
 from src.databases.admin_database import AdminDatabase
 from src.databases.strava_data_database import StravaDataDatabase
+from src.strava_client import StravaClient
 from src.sync_service import ActivitySyncService
 
 # Load test environment variables (override=True ensures test values take precedence)
 load_dotenv("tests/.env.test", override=True)
 
 
+def _database_name(database_url):
+    """Return the database name from the path of a Postgres URL."""
+    return urlsplit(database_url).path.lstrip("/")
+
+
+def _with_database_name(database_url, name):
+    """Return database_url pointing at another database, keeping its query string."""
+    return urlsplit(database_url)._replace(path=f"/{name}").geturl()
+
+
+# Under pytest-xdist each worker gets its own database (e.g. strava_tracker_test_gw0)
+# so parallel workers can't truncate each other's data
+_xdist_worker = os.environ.get("PYTEST_XDIST_WORKER")
+if _xdist_worker and os.environ.get("DATABASE_URL"):
+    _url = os.environ["DATABASE_URL"]
+    os.environ["DATABASE_URL"] = _with_database_name(
+        _url, f"{_database_name(_url)}_{_xdist_worker}"
+    )
+
+# Fixtures that need the test database; sync_service pulls in data_db
+DATABASE_FIXTURES = frozenset({"admin_db", "data_db"})
+
+# Set when preparing the test database fails, raised again by pg_pool
+_database_setup_error = pytest.StashKey[Exception]()
+
+# Connection to the postgres maintenance database, see _get_maintenance_connection
+_maintenance_conn = None
+
+# Default values restored into the settings table when reusing a test database
+DEFAULT_SETTINGS = {
+    'activity_filter_days': '90',
+    'discount_threshold_activities': '5',
+    'target_latitude': '50.097416',
+    'target_longitude': '14.462274',
+    'filter_radius_km': '1.0',
+}
+
+# Empties the data tables and restores default settings left behind by an
+# interrupted run. Only settings that differ from their default are rewritten.
+RESET_DATABASE_SQL = """
+    TRUNCATE TABLE activities, athletes, date_location_filters
+        RESTART IDENTITY CASCADE;
+    UPDATE settings SET value = defaults.value
+    FROM (VALUES {rows}) AS defaults (key, value)
+    WHERE settings.key = defaults.key
+      AND settings.value IS DISTINCT FROM defaults.value;
+""".format(rows=", ".join(["(%s, %s)"] * len(DEFAULT_SETTINGS)))
+
+
+def _reset_database(cursor):
+    """Run RESET_DATABASE_SQL with the default settings as parameters."""
+    params = [item for setting in DEFAULT_SETTINGS.items() for item in setting]
+    cursor.execute(RESET_DATABASE_SQL, params)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--reuse-db",
+        action="store_true",
+        default=False,
+        help="Keep the existing test database instead of recreating it",
+    )
+
+
 @pytest.fixture(scope="session")
 def test_config():
     """Create test configuration.
@@ -26,111 +96,258 @@ def test_config():
     return Config()
 
 
-@pytest.fixture(scope="session")
-def setup_test_database(test_config):
-    """Create test database if it doesn't exist."""
-    # Connect to postgres database to create test database
-    base_url = test_config.DATABASE_URL.rsplit('/', 1)[0]
-    conn = psycopg2.connect(f"{base_url}/postgres")
-    conn.autocommit = True
-    cursor = conn.cursor()
+def _schema_fingerprint():
+    """Hash the table definitions so schema changes force a fresh database.
+
+    There is no separate schema file; the tables are created by the database
+    classes themselves, so their init methods are the schema.
+    """
+    source = inspect.getsource(AdminDatabase.init_admin_tables) + inspect.getsource(
+        StravaDataDatabase.init_data_tables
+    )
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def _reset_existing_database(database_url):
+    """Truncate the test database in place, returning False if it doesn't exist."""
+    try:
+        conn = psycopg2.connect(database_url)
+    except psycopg2.OperationalError:
+        return False
 
+    # Clear anything left behind by a previous run; tables are only
+    # created if missing, so the schema itself is kept
     try:
-        # Drop and recreate test database for clean state
-        cursor.execute("DROP DATABASE IF EXISTS strava_tracker_test")
-        cursor.execute("CREATE DATABASE strava_tracker_test")
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT to_regclass('activities') IS NOT NULL
+                   AND to_regclass('date_location_filters') IS NOT NULL
+                   AND to_regclass('settings') IS NOT NULL
+            """)
+            if cursor.fetchone()[0]:
+                _reset_database(cursor)
+        conn.commit()
     finally:
-        cursor.close()
         conn.close()
+    return True
 
-    yield
 
-    # Teardown: optionally drop test database after all tests
-    # Uncomment if you want to clean up after tests
-    # conn = psycopg2.connect(f"{base_url}/postgres")
-    # conn.autocommit = True
-    # cursor = conn.cursor()
-    # cursor.execute("DROP DATABASE IF EXISTS strava_tracker_test")
-    # cursor.close()
-    # conn.close()
+def _get_maintenance_connection(database_url):
+    """Return the autocommit connection to the postgres maintenance database.
 
+    Opened on first use only, since a reused test database never needs it,
+    and closed in pytest_sessionfinish.
+    """
+    global _maintenance_conn
+    if _maintenance_conn is None or _maintenance_conn.closed:
+        _maintenance_conn = psycopg2.connect(_with_database_name(database_url, "postgres"))
+        _maintenance_conn.autocommit = True
+    return _maintenance_conn
+
+
+def _setup_test_database(config):
+    """Create test database, or reuse the existing one when its schema is current.
+
+    The schema fingerprint of the last created database is kept in the pytest
+    cache. While it matches (or with --reuse-db) the existing database is just
+    truncated, skipping the round-trip to the postgres maintenance database.
+    The database is left in place after the run so the next one can reuse it.
+    Without the cache (-p no:cacheprovider) it is always recreated unless
+    --reuse-db is given.
+    """
+    database_url = Config().DATABASE_URL
+    db_name = _database_name(database_url)
+    cache_key = f"strava/db_schema_hash/{db_name}"
+    schema_hash = _schema_fingerprint()
+    cache = getattr(config, "cache", None)
+
+    reuse = (
+        config.getoption("--reuse-db")
+        or (cache is not None and cache.get(cache_key, None) == schema_hash)
+    ) and _reset_existing_database(database_url)
+
+    if not reuse:
+        # Drop and recreate the test database from the postgres maintenance database
+        with _get_maintenance_connection(database_url).cursor() as cursor:
+            cursor.execute(
+                sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name))
+            )
+            cursor.execute(
+                sql.SQL("CREATE DATABASE {}").format(sql.Identifier(db_name))
+            )
+
+        if cache is not None:
+            cache.set(cache_key, schema_hash)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Mark tests by whether they need the database.
+
+    Tests using a database fixture are marked integration, all others unit,
+    so `pytest -m unit` runs without Postgres.
+    """
+    for item in items:
+        if DATABASE_FIXTURES & set(getattr(item, "fixturenames", ())):
+            item.add_marker(pytest.mark.integration)
+        else:
+            item.add_marker(pytest.mark.unit)
 
-@pytest.fixture
-def admin_db(test_config, setup_test_database):
-    """Create AdminDatabase instance with clean state for each test."""
-    db = AdminDatabase(test_config.DATABASE_URL)
-    yield db
 
-    # Cleanup: clear all data after each test
-    with db.get_connection() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM date_location_filters")
-            # Reset settings to defaults
-            cursor.execute("""
-                UPDATE settings SET value = '90' WHERE key = 'activity_filter_days';
-                UPDATE settings SET value = '5' WHERE key = 'discount_threshold_activities';
-                UPDATE settings SET value = '50.097416' WHERE key = 'target_latitude';
-                UPDATE settings SET value = '14.462274' WHERE key = 'target_longitude';
-                UPDATE settings SET value = '1.0' WHERE key = 'filter_radius_km';
-            """)
-            conn.commit()
+def pytest_collection_finish(session):
+    """Prepare the test database once collection shows a test needs it.
 
+    Runs before any fixture is set up, so the database fixtures don't have to
+    depend on a setup fixture. Runs that only select unit tests (and the
+    xdist controller, which collects nothing) never connect to Postgres.
+    """
+    if session.config.option.collectonly:
+        return
+    needs_database = any(
+        DATABASE_FIXTURES & set(getattr(item, "fixturenames", ()))
+        for item in session.items
+    )
+    if not needs_database:
+        return
 
-@pytest.fixture
-def data_db(test_config, setup_test_database):
-    """Create StravaDataDatabase instance with clean state for each test."""
-    db = StravaDataDatabase(test_config.DATABASE_URL)
-    yield db
+    try:
+        _setup_test_database(session.config)
+    except Exception as exc:
+        # Report the failure on the database tests instead of aborting the
+        # whole run, so unit tests still run without Postgres
+        session.config.stash[_database_setup_error] = exc
 
-    # Cleanup: clear all data after each test
-    with db.get_connection() as conn:
-        with conn.cursor() as cursor:
-            cursor.execute("DELETE FROM activities")
-            cursor.execute("DELETE FROM athletes")
-            conn.commit()
 
+def pytest_sessionfinish(session, exitstatus):
+    """Close the maintenance connection if database setup opened one."""
+    if _maintenance_conn is not None:
+        _maintenance_conn.close()
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
+def pg_pool(request, test_config):
+    """Connection pool shared by the database fixtures for the whole session."""
+    setup_error = request.config.stash.get(_database_setup_error, None)
+    if setup_error is not None:
+        raise setup_error
+
+    pool = ThreadedConnectionPool(1, 8, test_config.DATABASE_URL)
+    yield pool
+    pool.closeall()
+
+
+@pytest.fixture(scope="session")
+def admin_db(test_config, pg_pool):
+    """Create AdminDatabase instance shared by all tests.
+
+    Per-test isolation is handled by the db_transaction fixture.
+    """
+    return AdminDatabase(test_config.DATABASE_URL, pool=pg_pool)
+
+
+@pytest.fixture(scope="session")
+def data_db(test_config, pg_pool):
+    """Create StravaDataDatabase instance shared by all tests.
+
+    Per-test isolation is handled by the db_transaction fixture.
+    """
+    return StravaDataDatabase(test_config.DATABASE_URL, pool=pg_pool)
+
+
+@pytest.fixture(scope="session")
 def sync_service(data_db, test_config):
     """Create ActivitySyncService instance."""
     return ActivitySyncService(data_db, test_config)
 
 
-@pytest.fixture
-def mock_strava_client():
-    """Create a mock Strava client for testing without real API calls."""
-    mock_client = Mock()
-    mock_client.access_token = "test_access_token"
-    mock_client.refresh_token = "test_refresh_token"
-    mock_client.expires_at = int((datetime.now() + timedelta(hours=6)).timestamp())
-    mock_client.athlete_id = "12345"
+class _TestConnection:
+    """Connection proxy whose commit() is a no-op.
 
-    # Mock token exchange
-    mock_client.exchange_code_for_tokens = Mock(return_value="12345")
+    Everything the app writes during a test stays in one open transaction
+    that the db_transaction fixture rolls back afterwards.
+    """
 
-    # Mock ensure valid token (no refresh needed)
-    mock_client.ensure_valid_token = Mock()
+    def __init__(self, conn):
+        self._conn = conn
 
-    # Mock fetch activities with sample data
-    mock_client.fetch_all_activities = Mock(return_value=[])
+    def commit(self):
+        pass
 
-    return mock_client
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
 
 
-@pytest.fixture
+class _SingleConnectionPool:
+    """Pool stand-in that hands out the same connection on every getconn()."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def getconn(self):
+        return self._conn
+
+    def putconn(self, conn):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def db_transaction(request):
+    """Run each test that uses the database inside a transaction that is rolled back.
+
+    Both database objects are pointed at a single pooled connection for the
+    duration of the test, so nothing a test writes is ever committed and no
+    cleanup queries are needed. Unit tests that don't request a database
+    fixture never touch Postgres.
+    """
+    if not DATABASE_FIXTURES & set(request.fixturenames):
+        yield
+        return
+
+    pg_pool = request.getfixturevalue("pg_pool")
+    databases = [request.getfixturevalue("admin_db"), request.getfixturevalue("data_db")]
+
+    conn = pg_pool.getconn()
+    test_pool = _SingleConnectionPool(_TestConnection(conn))
+    for db in databases:
+        db.pool = test_pool
+
+    try:
+        yield
+    finally:
+        for db in databases:
+            db.pool = pg_pool
+        conn.rollback()
+        pg_pool.putconn(conn)
+
+
+@pytest.fixture(autouse=True)
+def clear_rate_limiters():
+    """Drop the per-application rate limit buckets after each test.
+
+    StravaClient keeps them at class level, so without this a bucket drained
+    or slowed down by one test would carry over into the next.
+    """
+    yield
+    StravaClient._rate_limiters.clear()
+
+
+@pytest.fixture(scope="session")
 def sample_athlete():
-    """Sample athlete data for testing."""
-    return {
+    """Sample athlete data for testing (read-only, shared by all tests)."""
+    return MappingProxyType({
         "athlete_id": "12345",
         "first_name": "Test",
         "last_name": "Athlete",
-    }
+    })
 
 
-@pytest.fixture
-def sample_activity():
-    """Sample activity data with GPS coordinates."""
-    return {
+@pytest.fixture(scope="session")
+def make_activity():
+    """Factory for activity dicts built from one shared base activity.
+
+    The base is a Run near the default location; keyword arguments override
+    individual fields. Each call returns a new dict that can be modified.
+    """
+    base = MappingProxyType({
         "id": 1001,
         "name": "Morning Run",
         "type": "Run",
@@ -141,41 +358,65 @@ def sample_activity():
         "total_elevation_gain": 50.0,
         "start_latlng": [50.097416, 14.462274],  # Near default location
         "end_latlng": [50.098000, 14.463000],    # Near default location
-    }
+    })
 
+    def _make(**overrides):
+        return {**base, **overrides}
 
-@pytest.fixture
-def sample_activity_far():
+    return _make
+
+
+@pytest.fixture(scope="session")
+def sample_activity(make_activity):
+    """Sample activity data with GPS coordinates (read-only, shared by all tests).
+
+    Use dict(sample_activity) to get a copy that can be modified.
+    """
+    return MappingProxyType(make_activity())
+
+
+@pytest.fixture(scope="session")
+def sample_activity_far(make_activity):
     """Sample activity data with GPS coordinates far from default location."""
-    return {
-        "id": 1002,
-        "name": "Evening Run",
-        "type": "Run",
-        "start_date": "2025-10-11T18:00:00Z",
-        "distance": 7000.0,
-        "moving_time": 2400,
-        "elapsed_time": 2500,
-        "total_elevation_gain": 80.0,
-        "start_latlng": [51.5074, -0.1278],  # London - far from default
-        "end_latlng": [51.5080, -0.1280],
-    }
+    return MappingProxyType(make_activity(
+        id=1002,
+        name="Evening Run",
+        start_date="2025-10-11T18:00:00Z",
+        distance=7000.0,
+        moving_time=2400,
+        elapsed_time=2500,
+        total_elevation_gain=80.0,
+        start_latlng=[51.5074, -0.1278],  # London - far from default
+        end_latlng=[51.5080, -0.1280],
+    ))
 
 
-@pytest.fixture
-def sample_activity_no_gps():
+@pytest.fixture(scope="session")
+def sample_activity_no_gps(make_activity):
     """Sample activity data without GPS coordinates."""
-    return {
-        "id": 1003,
-        "name": "Indoor Bike",
-        "type": "VirtualRide",
-        "start_date": "2025-10-12T10:00:00Z",
-        "distance": 15000.0,
-        "moving_time": 3600,
-        "elapsed_time": 3600,
-        "total_elevation_gain": 0.0,
-        "start_latlng": None,
-        "end_latlng": None,
-    }
+    return MappingProxyType(make_activity(
+        id=1003,
+        name="Indoor Bike",
+        type="VirtualRide",
+        start_date="2025-10-12T10:00:00Z",
+        distance=15000.0,
+        moving_time=3600,
+        elapsed_time=3600,
+        total_elevation_gain=0.0,
+        start_latlng=None,
+        end_latlng=None,
+    ))
+
+
+@pytest.fixture(scope="session")
+def default_athlete_id(data_db):
+    """Id of the default test athlete, created once for the whole session.
+
+    The athlete is upserted before any per-test transaction starts, so it is
+    committed and survives the rollback after each test.
+    """
+    data_db.upsert_athlete("12345", "Test", "Athlete")
+    return "12345"
 
 
 @pytest.fixture
@@ -187,39 +428,57 @@ def create_test_athlete(data_db):
     return _create_athlete
 
 
+def _insert_activities(data_db, athlete_id, activities):
+    """Insert activities with raw_data in a single multi-row INSERT."""
+    rows = [
+        (
+            activity_data["id"],
+            athlete_id,
+            activity_data["name"],
+            activity_data["type"],
+            activity_data["start_date"],
+            activity_data["distance"],
+            activity_data["moving_time"],
+            activity_data["elapsed_time"],
+            activity_data.get("total_elevation_gain", 0),
+            activity_data.get("distance", 0) / activity_data.get("moving_time", 1),
+            activity_data.get("distance", 0) / activity_data.get("moving_time", 1) * 1.5,
+            Json(dict(activity_data)),  # Store full data as JSON text
+        )
+        for activity_data in activities
+    ]
+    with data_db.get_connection() as conn:
+        with conn.cursor() as cursor:
+            execute_values(cursor, """
+                INSERT INTO activities (
+                    activity_id, athlete_id, name, type, start_date,
+                    distance, moving_time, elapsed_time, total_elevation_gain,
+                    average_speed, max_speed, raw_data
+                ) VALUES %s
+                ON CONFLICT (activity_id) DO NOTHING
+            """, rows)
+            conn.commit()
+
+
 @pytest.fixture
 def create_test_activity(data_db):
     """Factory fixture to create test activities."""
     def _create_activity(athlete_id, activity_data):
         """Insert activity with raw_data containing GPS coordinates."""
-        with data_db.get_connection() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO activities (
-                        activity_id, athlete_id, name, type, start_date,
-                        distance, moving_time, elapsed_time, total_elevation_gain,
-                        average_speed, max_speed, raw_data
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (activity_id) DO NOTHING
-                """, (
-                    activity_data["id"],
-                    athlete_id,
-                    activity_data["name"],
-                    activity_data["type"],
-                    activity_data["start_date"],
-                    activity_data["distance"],
-                    activity_data["moving_time"],
-                    activity_data["elapsed_time"],
-                    activity_data.get("total_elevation_gain", 0),
-                    activity_data.get("distance", 0) / activity_data.get("moving_time", 1),
-                    activity_data.get("distance", 0) / activity_data.get("moving_time", 1) * 1.5,
-                    json.dumps(activity_data),  # Store full data as JSON string
-                ))
-                conn.commit()
+        _insert_activities(data_db, athlete_id, [activity_data])
         return activity_data["id"]
     return _create_activity
 
 
+@pytest.fixture
+def bulk_create_activities(data_db):
+    """Factory fixture to create several test activities in one round trip."""
+    def _create_activities(athlete_id, activities):
+        _insert_activities(data_db, athlete_id, activities)
+        return [activity_data["id"] for activity_data in activities]
+    return _create_activities
+
+
 @pytest.fixture
 def create_date_filter(admin_db):
     """Factory fixture to create date-specific location filters."""
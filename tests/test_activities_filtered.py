@@ -7,11 +7,11 @@ class TestGetActivitiesFiltered:
     """Test suite for StravaDataDatabase.get_activities_filtered()"""
 
     def test_basic_retrieval_without_admin_db(
-        self, data_db, create_test_athlete, create_test_activity, sample_activity
+        self, data_db, default_athlete_id, create_test_activity, sample_activity
     ):
         """Test basic activity retrieval without location filtering."""
-        # Setup: Create athlete and activity
-        athlete_id = create_test_athlete()
+        # Setup: Create activity
+        athlete_id = default_athlete_id
         create_test_activity(athlete_id, sample_activity)
 
         # Execute: Get activities without admin_db (no location filtering)
@@ -40,13 +40,13 @@ class TestGetActivitiesFiltered:
         self,
         data_db,
         admin_db,
-        create_test_athlete,
+        default_athlete_id,
         create_test_activity,
         sample_activity,
     ):
         """Test location filtering with activity that matches default location."""
-        # Setup: Create athlete and activity near default location (Prague)
-        athlete_id = create_test_athlete()
+        # Setup: Create activity near default location (Prague)
+        athlete_id = default_athlete_id
         create_test_activity(athlete_id, sample_activity)
 
         # Execute: Get activities with admin_db (enables location filtering)
@@ -82,13 +82,13 @@ class TestGetActivitiesFiltered:
         self,
         data_db,
         admin_db,
-        create_test_athlete,
+        default_athlete_id,
         create_test_activity,
         sample_activity_far,
     ):
         """Test location filtering with activity that doesn't match default location."""
-        # Setup: Create athlete and activity far from default location (London)
-        athlete_id = create_test_athlete()
+        # Setup: Create activity far from default location (London)
+        athlete_id = default_athlete_id
         create_test_activity(athlete_id, sample_activity_far)
 
         # Execute
@@ -117,26 +117,25 @@ class TestGetActivitiesFiltered:
         self,
         data_db,
         admin_db,
-        create_test_athlete,
+        default_athlete_id,
         create_test_activity,
+        make_activity,
     ):
         """Test location filtering with activity that has no GPS coordinates."""
-        # Setup: Create athlete and Run activity without GPS (e.g., treadmill run)
-        athlete_id = create_test_athlete()
+        # Setup: Create Run activity without GPS (e.g., treadmill run)
+        athlete_id = default_athlete_id
 
         # Create a Run activity without GPS coordinates
-        treadmill_run = {
-            "id": 1003,
-            "name": "Treadmill Run",
-            "type": "Run",  # Must be Run type to be returned by the query
-            "start_date": "2025-10-12T10:00:00Z",
-            "distance": 5000.0,
-            "moving_time": 1800,
-            "elapsed_time": 1800,
-            "total_elevation_gain": 0.0,
-            "start_latlng": None,
-            "end_latlng": None,
-        }
+        # (the base activity is a Run, which the query requires)
+        treadmill_run = make_activity(
+            id=1003,
+            name="Treadmill Run",
+            start_date="2025-10-12T10:00:00Z",
+            elapsed_time=1800,
+            total_elevation_gain=0.0,
+            start_latlng=None,
+            end_latlng=None,
+        )
         create_test_activity(athlete_id, treadmill_run)
 
         # Execute
@@ -162,27 +161,22 @@ class TestGetActivitiesFiltered:
         self,
         data_db,
         admin_db,
-        create_test_athlete,
+        default_athlete_id,
         create_test_activity,
         create_date_filter,
+        make_activity,
     ):
         """Test location filtering with date-specific location override."""
-        # Setup: Create athlete and activity
-        athlete_id = create_test_athlete()
+        # Setup: Create activity
+        athlete_id = default_athlete_id
 
         # Create activity on specific date
-        activity_data = {
-            "id": 2001,
-            "name": "Special Event Run",
-            "type": "Run",
-            "start_date": "2025-10-10T08:00:00Z",
-            "distance": 5000.0,
-            "moving_time": 1800,
-            "elapsed_time": 1900,
-            "total_elevation_gain": 50.0,
-            "start_latlng": [51.5074, -0.1278],  # London coordinates
-            "end_latlng": [51.5080, -0.1280],
-        }
+        activity_data = make_activity(
+            id=2001,
+            name="Special Event Run",
+            start_latlng=[51.5074, -0.1278],  # London coordinates
+            end_latlng=[51.5080, -0.1280],
+        )
         create_test_activity(athlete_id, activity_data)
 
         # Create date-specific filter for that date, centered on London
@@ -217,54 +211,36 @@ class TestGetActivitiesFiltered:
         self,
         data_db,
         admin_db,
-        create_test_athlete,
-        create_test_activity,
+        default_athlete_id,
+        bulk_create_activities,
+        make_activity,
     ):
         """Test that multiple activities are returned in correct order (DESC by date)."""
-        # Setup: Create athlete
-        athlete_id = create_test_athlete()
+        # Setup: Use the default athlete
+        athlete_id = default_athlete_id
 
         # Create activities with different dates
-        activity1 = {
-            "id": 3001,
-            "name": "Run 1",
-            "type": "Run",
-            "start_date": "2025-10-10T08:00:00Z",
-            "distance": 5000.0,
-            "moving_time": 1800,
-            "elapsed_time": 1900,
-            "total_elevation_gain": 50.0,
-            "start_latlng": [50.097416, 14.462274],
-            "end_latlng": [50.098000, 14.463000],
-        }
-        activity2 = {
-            "id": 3002,
-            "name": "Run 2",
-            "type": "Run",
-            "start_date": "2025-10-12T08:00:00Z",  # Later date
-            "distance": 7000.0,
-            "moving_time": 2400,
-            "elapsed_time": 2500,
-            "total_elevation_gain": 80.0,
-            "start_latlng": [50.097416, 14.462274],
-            "end_latlng": [50.098000, 14.463000],
-        }
-        activity3 = {
-            "id": 3003,
-            "name": "Run 3",
-            "type": "Run",
-            "start_date": "2025-10-11T08:00:00Z",  # Middle date
-            "distance": 6000.0,
-            "moving_time": 2100,
-            "elapsed_time": 2200,
-            "total_elevation_gain": 60.0,
-            "start_latlng": [50.097416, 14.462274],
-            "end_latlng": [50.098000, 14.463000],
-        }
-
-        create_test_activity(athlete_id, activity1)
-        create_test_activity(athlete_id, activity2)
-        create_test_activity(athlete_id, activity3)
+        activity1 = make_activity(id=3001, name="Run 1")
+        activity2 = make_activity(
+            id=3002,
+            name="Run 2",
+            start_date="2025-10-12T08:00:00Z",  # Later date
+            distance=7000.0,
+            moving_time=2400,
+            elapsed_time=2500,
+            total_elevation_gain=80.0,
+        )
+        activity3 = make_activity(
+            id=3003,
+            name="Run 3",
+            start_date="2025-10-11T08:00:00Z",  # Middle date
+            distance=6000.0,
+            moving_time=2100,
+            elapsed_time=2200,
+            total_elevation_gain=60.0,
+        )
+
+        bulk_create_activities(athlete_id, [activity1, activity2, activity3])
 
         # Execute
         activities = data_db.get_activities_filtered(athlete_id, admin_db=admin_db)
@@ -276,26 +252,21 @@ class TestGetActivitiesFiltered:
         assert activities[2]["activity_id"] == 3001  # Earliest (2025-10-10)
 
     def test_limit_parameter(
-        self, data_db, create_test_athlete, create_test_activity
+        self, data_db, default_athlete_id, bulk_create_activities, make_activity
     ):
         """Test that limit parameter correctly restricts number of results."""
-        # Setup: Create athlete and multiple activities
-        athlete_id = create_test_athlete()
-
-        for i in range(5):
-            activity = {
-                "id": 4000 + i,
-                "name": f"Run {i}",
-                "type": "Run",
-                "start_date": f"2025-10-{10+i:02d}T08:00:00Z",
-                "distance": 5000.0,
-                "moving_time": 1800,
-                "elapsed_time": 1900,
-                "total_elevation_gain": 50.0,
-                "start_latlng": [50.097416, 14.462274],
-                "end_latlng": [50.098000, 14.463000],
-            }
-            create_test_activity(athlete_id, activity)
+        # Setup: Create multiple activities
+        athlete_id = default_athlete_id
+
+        activities = [
+            make_activity(
+                id=4000 + i,
+                name=f"Run {i}",
+                start_date=f"2025-10-{10+i:02d}T08:00:00Z",
+            )
+            for i in range(5)
+        ]
+        bulk_create_activities(athlete_id, activities)
 
         # Execute: Get activities with limit
         activities = data_db.get_activities_filtered(athlete_id, limit=3)
@@ -314,25 +285,14 @@ class TestGetActivitiesFiltered:
         assert activities == []
 
     def test_filters_only_run_activities(
-        self, data_db, create_test_athlete, create_test_activity
+        self, data_db, default_athlete_id, create_test_activity, make_activity
     ):
         """Test that only 'Run' type activities are returned."""
-        # Setup: Create athlete
-        athlete_id = create_test_athlete()
+        # Setup: Use the default athlete
+        athlete_id = default_athlete_id
 
         # Create a Run activity
-        run_activity = {
-            "id": 5001,
-            "name": "Morning Run",
-            "type": "Run",
-            "start_date": "2025-10-10T08:00:00Z",
-            "distance": 5000.0,
-            "moving_time": 1800,
-            "elapsed_time": 1900,
-            "total_elevation_gain": 50.0,
-            "start_latlng": [50.097416, 14.462274],
-            "end_latlng": [50.098000, 14.463000],
-        }
+        run_activity = make_activity(id=5001)
 
         # Note: The create_test_activity will insert the activity as-is
         # The filter is applied at query time in get_activities_filtered
@@ -0,0 +1,362 @@
+"""Unit tests for StravaClient pagination and rate limiting."""
+
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from unittest.mock import Mock, call, patch
+
+from src.strava_client import StravaClient, TokenBucket
+
+
+@pytest.fixture
+def strava_stub():
+    """Serve a fixed status on localhost and count the requests that arrive.
+
+    Set stub.status and stub.headers to choose the response; stub.hits holds
+    the number of requests the server actually received.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            server.hits += 1
+            self.send_response(server.status)
+            for name, value in server.headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', '2')
+            self.end_headers()
+            self.wfile.write(b'[]')
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.status = 200
+    server.headers = {}
+    server.hits = 0
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestTokenBucket:
+    """Test suite for the TokenBucket rate limiter."""
+
+    def test_acquire_does_not_sleep_while_tokens_available(self):
+        """Test that requests within budget go out immediately."""
+        bucket = TokenBucket(capacity=3, refill_seconds=900)
+
+        with patch('src.strava_client.time.sleep') as mock_sleep:
+            for _ in range(3):
+                bucket.acquire()
+
+        mock_sleep.assert_not_called()
+
+    def test_acquire_sleeps_until_next_token_when_empty(self):
+        """Test that an empty bucket waits for exactly one token's refill time."""
+        bucket = TokenBucket(capacity=100, refill_seconds=900)
+        bucket.tokens = 0.0
+
+        with patch('src.strava_client.time.monotonic', return_value=bucket.last_refill):
+            with patch('src.strava_client.time.sleep') as mock_sleep:
+                bucket.acquire()
+
+        # 100 tokens per 900s -> 9s per token
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args[0][0] == pytest.approx(9.0)
+
+    def test_backoff_halves_rate_down_to_floor(self):
+        """Test multiplicative decrease of the refill rate when throttled."""
+        bucket = TokenBucket(capacity=100, refill_seconds=900)
+
+        bucket.backoff()
+        assert bucket.rate == pytest.approx(bucket.max_rate / 2)
+
+        for _ in range(10):
+            bucket.backoff()
+        assert bucket.rate == pytest.approx(bucket.min_rate)
+
+    def test_recover_increases_rate_up_to_max(self):
+        """Test additive increase of the refill rate after successful requests."""
+        bucket = TokenBucket(capacity=100, refill_seconds=900)
+        bucket.rate = bucket.min_rate
+
+        bucket.recover()
+        assert bucket.rate == pytest.approx(bucket.min_rate + bucket.max_rate / 10)
+
+        for _ in range(20):
+            bucket.recover()
+        assert bucket.rate == pytest.approx(bucket.max_rate)
+
+    def test_set_remaining_caps_at_capacity(self):
+        """Test that reported remaining requests never exceed bucket capacity."""
+        bucket = TokenBucket(capacity=100, refill_seconds=900)
+
+        bucket.set_remaining(500)
+        assert bucket.tokens == 100
+
+        bucket.set_remaining(7)
+        assert bucket.tokens == 7
+
+    def test_set_remaining_keeps_reservations_of_waiting_callers(self):
+        """Test that a reported budget never raises a negative balance."""
+        bucket = TokenBucket(capacity=100, refill_seconds=900)
+        bucket.tokens = -5.0
+
+        with patch('src.strava_client.time.monotonic', return_value=bucket.last_refill):
+            bucket.set_remaining(50)
+
+        assert bucket.tokens == -5.0
+
+
+class TestStravaClient:
+    """Test suite for StravaClient logic that doesn't need the Strava API."""
+
+    @pytest.fixture
+    def client(self):
+        """Create a StravaClient with a valid-looking token."""
+        client = StravaClient('test_client_id', 'test_client_secret')
+        client.set_tokens(
+            'test_access_token', 'test_refresh_token', int(time.time()) + 6 * 3600
+        )
+        return client
+
+    # ===== Token validity Tests =====
+
+    def test_token_valid_until_shortly_before_expiry(self, client):
+        """Test that a token close to expiry is treated as expired."""
+        now = time.time()
+
+        client.set_tokens('access', 'refresh', int(now) + 3600)
+        assert client.is_token_valid() is True
+
+        client.set_tokens('access', 'refresh', int(now) + 30)
+        assert client.is_token_valid() is False
+
+    def test_token_without_expiry_is_valid(self, client):
+        """Test that a token with no expiry timestamp is considered valid."""
+        client.set_tokens('access', 'refresh', None)
+
+        assert client.is_token_valid() is True
+
+    def test_get_all_activities_checks_token_once(self, client):
+        """Test that the token is validated once per batch, not once per page."""
+        # Setup
+        client.ensure_valid_token = Mock(return_value=True)
+        client._get_activities_page = Mock(side_effect=[[{'id': i} for i in range(200)], []])
+
+        # Execute
+        client.get_all_activities()
+
+        # Verify
+        client.ensure_valid_token.assert_called_once()
+
+    # ===== Rate limit Tests =====
+
+    def test_clients_with_same_app_share_rate_limiter(self):
+        """Test that the rate limit budget is shared per Strava application."""
+        first = StravaClient('shared_app', 'secret')
+        second = StravaClient('shared_app', 'secret')
+        other = StravaClient('other_app', 'secret')
+
+        assert first._bucket is second._bucket
+        assert first._bucket is not other._bucket
+
+    def test_rate_limiter_created_once_per_app(self):
+        """Test that a bucket is only built for the first client of an application."""
+        with patch('src.strava_client.TokenBucket') as mock_bucket:
+            StravaClient('shared_app', 'secret')
+            StravaClient('shared_app', 'secret')
+
+        mock_bucket.assert_called_once_with()
+
+    def test_concurrently_created_clients_share_rate_limiter(self):
+        """Test that clients built on several threads at once get the same bucket."""
+        # Setup
+        barrier = threading.Barrier(8)
+        clients = []
+
+        def create_client():
+            barrier.wait()
+            clients.append(StravaClient('concurrent_app', 'secret'))
+
+        threads = [threading.Thread(target=create_client) for _ in range(8)]
+
+        # Execute
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Verify
+        assert len({id(c._bucket) for c in clients}) == 1
+
+    def test_rate_limit_headers_update_budget(self, client):
+        """Test that X-RateLimit headers sync the local budget with Strava's usage."""
+        # Setup: Strava reports 50 of 100 short-term requests used
+        response = Mock()
+        response.headers = {'X-RateLimit-Limit': '100,1000', 'X-RateLimit-Usage': '50,300'}
+
+        # Execute
+        client._update_rate_limit(response)
+
+        # Verify: 50 remaining minus the 10% reserve
+        assert client._bucket.tokens == pytest.approx(40, abs=0.01)
+        assert client._bucket.rate == client._bucket.max_rate
+
+    def test_rate_limit_headers_throttle_above_90_percent(self, client):
+        """Test that the next request waits once short-term usage passes 90%."""
+        # Setup: 95 of 100 used leaves nothing outside the reserve
+        response = Mock()
+        response.headers = {'X-RateLimit-Limit': '100,1000', 'X-RateLimit-Usage': '95,300'}
+        client._update_rate_limit(response)
+
+        # Execute
+        with patch('src.strava_client.time.sleep') as mock_sleep:
+            client._bucket.acquire()
+
+        # Verify
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args[0][0] > 0
+
+    def test_rate_limit_headers_slow_down_near_daily_limit(self, client):
+        """Test that the refill rate drops when daily usage passes 90%."""
+        # Setup
+        response = Mock()
+        response.headers = {'X-RateLimit-Limit': '100,1000', 'X-RateLimit-Usage': '10,950'}
+
+        # Execute
+        client._update_rate_limit(response)
+
+        # Verify
+        assert client._bucket.rate < client._bucket.max_rate
+
+    # ===== get_activities() Tests =====
+
+    def test_get_activities_retries_after_rate_limit(self, client):
+        """Test that a 429 waits Retry-After, slows the bucket down and retries."""
+        # Setup: First response throttled, second succeeds
+        throttled = Mock(status_code=429, ok=False, headers={'Retry-After': '3'})
+        success = Mock(status_code=200, ok=True, headers={})
+        success.content = b'[{"id": 1}]'
+        client._session.get = Mock(side_effect=[throttled, success])
+
+        # Execute
+        with patch('src.strava_client.time.sleep') as mock_sleep:
+            activities = client.get_activities()
+
+        # Verify
+        assert activities == [{'id': 1}]
+        assert client._session.get.call_count == 2
+        mock_sleep.assert_called_once_with(3)
+        assert client._bucket.rate < client._bucket.max_rate
+
+    def test_get_activities_retries_server_error_through_rate_limiter(self, client):
+        """Test that a 5xx is retried by the client, taking a bucket token per attempt."""
+        # Setup
+        error = Mock(status_code=503, ok=False, headers={})
+        success = Mock(status_code=200, ok=True, headers={})
+        success.content = b'[{"id": 1}]'
+        client._session.get = Mock(side_effect=[error, success])
+        client._bucket.acquire = Mock()
+
+        # Execute
+        with patch('src.strava_client.time.sleep') as mock_sleep:
+            activities = client.get_activities()
+
+        # Verify
+        assert activities == [{'id': 1}]
+        assert client._bucket.acquire.call_count == 2
+        mock_sleep.assert_called_once_with(0.5)
+
+    @pytest.mark.parametrize(
+        'status, headers',
+        [(429, {'Retry-After': '1'}), (503, {'Retry-After': '1'}), (500, {})],
+        ids=['rate_limited', 'unavailable', 'server_error'],
+    )
+    def test_session_adapter_does_not_retry_activity_requests(
+        self, client, strava_stub, status, headers
+    ):
+        """Test that the mounted adapter returns a 429/5xx GET after one HTTP request."""
+        # Setup: Send requests to the local stub through the client's real adapter
+        strava_stub.status = status
+        strava_stub.headers = headers
+        client.BASE_URL = f'http://127.0.0.1:{strava_stub.server_address[1]}'
+        client._session.mount('http://', client._session.get_adapter('https://'))
+
+        # Execute
+        resp = client._request_activities({'page': 1})
+
+        # Verify
+        assert resp.status_code == status
+        assert strava_stub.hits == 1
+
+    # ===== get_all_activities() Tests =====
+
+    def test_get_all_activities_stops_after_short_page(self, client):
+        """Test pagination stops on a short page without requesting an empty one."""
+        # Setup: One full page followed by a partial page
+        full_page = [{'id': i} for i in range(200)]
+        short_page = [{'id': 200 + i} for i in range(5)]
+        client._get_activities_page = Mock(side_effect=[full_page, short_page])
+
+        # Execute
+        activities = client.get_all_activities()
+
+        # Verify: Both pages returned, no third request made
+        assert len(activities) == 205
+        assert client._get_activities_page.call_count == 2
+
+    def test_iter_activity_pages_passes_epoch_bounds(self, client):
+        """Test datetime bounds are converted to epoch seconds for every page."""
+        # Setup
+        after = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        client._get_activities_page = Mock(side_effect=[[{'id': i} for i in range(200)], []])
+
+        # Execute
+        list(client.iter_activity_pages(after=after))
+
+        # Verify
+        assert client._get_activities_page.call_args_list == [
+            call(None, 1735689600, 200, 1),
+            call(None, 1735689600, 200, 2),
+        ]
+
+    def test_naive_bounds_are_treated_as_utc(self, client):
+        """Test naive datetimes map to the same epoch as their UTC equivalent."""
+        # Setup
+        client._get_activities_page = Mock(return_value=[])
+
+        # Execute
+        list(client.iter_activity_pages(after=datetime(2025, 1, 1)))
+
+        # Verify
+        client._get_activities_page.assert_called_once_with(None, 1735689600, 200, 1)
+
+    def test_iter_activity_pages_yields_nothing_when_nothing_new(self, client):
+        """Test an empty first page ends the generator without yielding it."""
+        # Setup
+        client._get_activities_page = Mock(return_value=[])
+
+        # Execute
+        pages = list(client.iter_activity_pages())
+
+        # Verify
+        assert pages == []
+
+    def test_get_all_activities_single_request_when_nothing_new(self, client):
+        """Test an empty first page costs exactly one request."""
+        # Setup
+        client._get_activities_page = Mock(return_value=[])
+
+        # Execute
+        activities = client.get_all_activities()
+
+        # Verify
+        assert activities == []
+        client._get_activities_page.assert_called_once()
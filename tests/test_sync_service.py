@@ -1,185 +1,259 @@
 """Unit tests for ActivitySyncService logic."""
 
 import pytest
-from datetime import datetime, timedelta
-from unittest.mock import Mock
+import time_machine
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, create_autospec
 
+from src.databases.strava_data_database import StravaDataDatabase
+from src.strava_client import StravaClient
 from src.sync_service import ActivitySyncService
 
+# Fixed clock for tests that depend on the current time
+NOW = datetime(2025, 10, 15, 12, 0, 0, tzinfo=timezone.utc)
 
-class TestActivitySyncService:
-    """Test suite for ActivitySyncService business logic."""
+# Fixed token expiry (May 2033), far enough ahead to never lapse
+EXPIRES_AT = 2_000_000_000
 
-    @pytest.fixture
-    def mock_db(self):
-        """Create a mock database instance."""
-        db = Mock()
-        db.needs_sync = Mock()
-        db.get_latest_activity_date = Mock()
-        db.get_activities = Mock()
-        db.save_activities = Mock()
-        db.save_athlete_tokens = Mock()
-        db.get_athlete_tokens = Mock()
-        return db
-
-    @pytest.fixture
-    def mock_config(self):
-        """Create a mock configuration instance."""
-        config = Mock()
-        config.STRAVA_CLIENT_ID = 'test_client_id'
-        config.STRAVA_CLIENT_SECRET = 'test_client_secret'
-        config.STRAVA_REDIRECT_URI = 'http://localhost:8000/auth/strava/callback'
-        return config
-
-    @pytest.fixture
-    def mock_strava_client(self):
-        """Create a mock Strava client."""
-        client = Mock()
-        client.access_token = 'test_access_token'
-        client.refresh_token = 'test_refresh_token'
-        client.expires_at = int((datetime.now() + timedelta(hours=6)).timestamp())
-        client.get_all_activities = Mock(return_value=[])
-        return client
-
-    @pytest.fixture
-    def sync_service(self, mock_db, mock_config):
-        """Create ActivitySyncService instance with mocked dependencies."""
-        return ActivitySyncService(mock_db, mock_config)
+# Fields every sync result contains, with their allowed types
+RESULT_SCHEMA = {
+    'athlete_id': str,
+    'synced': bool,
+    'new_activities': int,
+    'total_activities': int,
+    'error': (str, type(None)),
+    'message': str,
+}
 
-    # ===== get_sync_start_date() Tests =====
 
-    def test_get_sync_start_date_first_time_sync(self, sync_service, mock_db):
-        """Test get_sync_start_date returns 180 days ago for first-time sync."""
-        # Setup: No activities exist (first-time sync)
-        mock_db.get_latest_activity_date.return_value = None
+# Mocks are built once per module and reset before each test by reset_mocks
 
-        # Execute
-        sync_start_date = sync_service.get_sync_start_date('12345')
+@pytest.fixture(scope='module')
+def mock_db():
+    """Create a mock database instance.
 
-        # Verify: Should return approximately 180 days ago
-        expected_date = datetime.now() - timedelta(days=180)
-        assert sync_start_date is not None
-        assert isinstance(sync_start_date, datetime)
+    spec_set makes calls with wrong arguments or misspelled methods fail.
+    """
+    return create_autospec(StravaDataDatabase, instance=True, spec_set=True)
 
-        # Check it's within 1 minute of expected (to account for test execution time)
-        time_diff = abs((sync_start_date - expected_date).total_seconds())
-        assert time_diff < 60, f"Expected ~180 days ago, got {time_diff} seconds difference"
 
-        # Verify database was queried
-        mock_db.get_latest_activity_date.assert_called_once_with('12345')
+@pytest.fixture(scope='module')
+def mock_config():
+    """Create a mock configuration instance."""
+    config = Mock()
+    config.STRAVA_CLIENT_ID = 'test_client_id'
+    config.STRAVA_CLIENT_SECRET = 'test_client_secret'
+    config.STRAVA_REDIRECT_URI = 'http://localhost:8000/auth/strava/callback'
+    return config
 
-    def test_get_sync_start_date_subsequent_sync(self, sync_service, mock_db):
-        """Test get_sync_start_date returns latest activity date minus 1 day for subsequent sync."""
-        # Setup: Latest activity exists
-        latest_activity_date = datetime(2025, 10, 15, 12, 0, 0)
-        mock_db.get_latest_activity_date.return_value = latest_activity_date
 
-        # Execute
-        sync_start_date = sync_service.get_sync_start_date('12345')
+@pytest.fixture(scope='module')
+def mock_strava_client():
+    """Create a mock Strava client.
 
-        # Verify: Should return latest activity date minus 1 day
-        expected_date = latest_activity_date - timedelta(days=1)
-        assert sync_start_date == expected_date
-        assert sync_start_date == datetime(2025, 10, 14, 12, 0, 0)
+    Not spec_set: the token attributes are only assigned in __init__, so the
+    spec doesn't know about them.
+    """
+    client = create_autospec(StravaClient, instance=True)
+    client.access_token = 'test_access_token'
+    client.refresh_token = 'test_refresh_token'
+    client.expires_at = EXPIRES_AT
+    return client
 
-        # Verify database was queried
-        mock_db.get_latest_activity_date.assert_called_once_with('12345')
 
-    def test_get_sync_start_date_with_recent_activity(self, sync_service, mock_db):
-        """Test get_sync_start_date with very recent activity (yesterday)."""
-        # Setup: Activity from yesterday
-        yesterday = datetime.now() - timedelta(days=1)
-        mock_db.get_latest_activity_date.return_value = yesterday
+@pytest.fixture(scope='module')
+def sync_service(mock_db, mock_config):
+    """Create ActivitySyncService instance with mocked dependencies."""
+    return ActivitySyncService(mock_db, mock_config)
 
-        # Execute
-        sync_start_date = sync_service.get_sync_start_date('12345')
 
-        # Verify: Should return 2 days ago (yesterday - 1 day)
-        expected_date = yesterday - timedelta(days=1)
-        assert sync_start_date == expected_date
+@pytest.fixture(autouse=True)
+def reset_mocks(mock_db, mock_strava_client):
+    """Clear calls, return values and side effects left by the previous test."""
+    for mock in (mock_db, mock_strava_client):
+        mock.reset_mock(return_value=True, side_effect=True)
+    mock_strava_client.iter_activity_pages.return_value = []
+
 
-    # ===== should_sync() Tests =====
+class TestActivitySyncService:
+    """Test suite for ActivitySyncService business logic."""
 
-    def test_should_sync_when_sync_needed(self, sync_service, mock_db):
-        """Test should_sync returns True when sync is needed."""
-        # Setup: Database indicates sync is needed
-        mock_db.needs_sync.return_value = True
+    # ===== get_sync_start_date() Tests =====
 
+    @time_machine.travel(NOW, tick=False)
+    def test_get_sync_start_date_first_time_sync(self, sync_service):
+        """Test get_sync_start_date returns 180 days ago for first-time sync."""
+        # Execute: No activities exist (first-time sync)
+        sync_start_date = sync_service.get_sync_start_date(None)
+
+        # Verify: Exactly 180 days before the frozen clock (naive UTC)
+        assert sync_start_date == datetime(2025, 4, 18, 12, 0, 0)
+
+    def test_get_sync_start_date_subsequent_sync(self, sync_service):
+        """Test get_sync_start_date returns latest activity date minus 1 day for subsequent sync."""
         # Execute
-        result = sync_service.should_sync('12345')
+        sync_start_date = sync_service.get_sync_start_date(datetime(2025, 10, 15, 12, 0, 0))
 
-        # Verify
-        assert result is True
-        mock_db.needs_sync.assert_called_once_with('12345', max_age_hours=1)
+        # Verify: Should return latest activity date minus 1 day
+        assert sync_start_date == datetime(2025, 10, 14, 12, 0, 0)
 
-    def test_should_sync_when_data_is_fresh(self, sync_service, mock_db):
-        """Test should_sync returns False when data is fresh."""
-        # Setup: Database indicates sync is not needed
-        mock_db.needs_sync.return_value = False
+    @time_machine.travel(NOW, tick=False)
+    def test_get_sync_start_date_with_recent_activity(self, sync_service):
+        """Test get_sync_start_date with very recent activity (yesterday)."""
+        # Setup: Activity from yesterday, relative to the frozen clock (naive UTC)
+        yesterday = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=1)
 
         # Execute
-        result = sync_service.should_sync('12345')
+        sync_start_date = sync_service.get_sync_start_date(yesterday)
 
-        # Verify
-        assert result is False
-        mock_db.needs_sync.assert_called_once_with('12345', max_age_hours=1)
+        # Verify: Should return 2 days ago (yesterday - 1 day)
+        assert sync_start_date == NOW.replace(tzinfo=None) - timedelta(days=2)
 
     # ===== sync_athlete_activities() Tests =====
 
     def test_sync_athlete_activities_successful_sync(
         self, sync_service, mock_db, mock_strava_client
     ):
-        """Test successful activity sync returns correct result structure."""
+        """Test successful activity sync reports the new activities."""
         # Setup
         athlete_id = '12345'
-        mock_db.needs_sync.return_value = True
-        mock_db.get_latest_activity_date.return_value = datetime(2025, 10, 10)
+        mock_db.get_sync_context.return_value = (True, datetime(2025, 10, 10))
         mock_db.save_activities.return_value = 5  # 5 new activities
-        mock_db.get_activities.return_value = ['act1', 'act2', 'act3', 'act4', 'act5']
-        mock_strava_client.get_all_activities.return_value = [
-            {'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}, {'id': 5}
+        mock_db.count_activities.return_value = 5
+        mock_strava_client.iter_activity_pages.return_value = [
+            [{'id': 1}, {'id': 2}, {'id': 3}, {'id': 4}, {'id': 5}]
         ]
 
         # Execute
         result = sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
 
-        # Verify result structure
-        assert isinstance(result, dict)
-        assert result['athlete_id'] == athlete_id
+        # Verify result
         assert result['synced'] is True
         assert result['new_activities'] == 5
         assert result['total_activities'] == 5
-        assert result['error'] is None
         assert 'sync_from_date' in result
-        assert 'message' in result
 
         # Verify database interactions
-        mock_db.needs_sync.assert_called_once()
+        mock_db.get_sync_context.assert_called_once_with(athlete_id, max_age_hours=1)
         mock_db.save_activities.assert_called_once()
         mock_db.save_athlete_tokens.assert_called_once()
 
+    def test_sync_athlete_activities_fetches_from_latest_activity(
+        self, sync_service, mock_db, mock_strava_client
+    ):
+        """Test that sync fetches from one day before the latest stored activity."""
+        # Setup
+        mock_db.get_sync_context.return_value = (True, datetime(2025, 10, 10, 8, 0, 0))
+        mock_db.count_activities.return_value = 0
+
+        # Execute
+        sync_service.sync_athlete_activities('12345', mock_strava_client)
+
+        # Verify
+        mock_strava_client.iter_activity_pages.assert_called_once_with(
+            after=datetime(2025, 10, 9, 8, 0, 0)
+        )
+
+    @time_machine.travel(NOW, tick=False)
+    def test_sync_athlete_activities_first_sync_fetches_six_months(
+        self, sync_service, mock_db, mock_strava_client
+    ):
+        """Test that a first sync fetches the last 180 days."""
+        # Setup: No stored activities yet
+        mock_db.get_sync_context.return_value = (True, None)
+        mock_db.count_activities.return_value = 0
+
+        # Execute
+        result = sync_service.sync_athlete_activities('12345', mock_strava_client)
+
+        # Verify
+        mock_strava_client.iter_activity_pages.assert_called_once_with(
+            after=datetime(2025, 4, 18, 12, 0, 0)
+        )
+        assert result['sync_from_date'] == '2025-04-18T12:00:00'
+
+    def test_sync_athlete_activities_saves_each_page(
+        self, sync_service, mock_db, mock_strava_client
+    ):
+        """Test that every fetched page is saved and new counts are summed."""
+        # Setup: Two pages, 200 and 3 new activities
+        athlete_id = '12345'
+        mock_db.get_sync_context.return_value = (True, datetime(2025, 10, 10))
+        mock_db.save_activities.side_effect = [200, 3]
+        mock_db.count_activities.return_value = 203
+        first_page = [{'id': i} for i in range(200)]
+        second_page = [{'id': 200 + i} for i in range(3)]
+        mock_strava_client.iter_activity_pages.return_value = [first_page, second_page]
+
+        # Execute
+        result = sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
+
+        # Verify
+        assert result['new_activities'] == 203
+        assert mock_db.save_activities.call_count == 2
+        mock_db.save_activities.assert_any_call(athlete_id, first_page)
+        mock_db.save_activities.assert_any_call(athlete_id, second_page)
+
+    def test_sync_athlete_activities_marks_synced_after_all_pages(
+        self, sync_service, mock_db, mock_strava_client
+    ):
+        """Test that last_sync is updated once, after every page is saved."""
+        # Setup
+        athlete_id = '12345'
+        mock_db.get_sync_context.return_value = (True, datetime(2025, 10, 10))
+        mock_db.save_activities.return_value = 1
+        mock_db.count_activities.return_value = 2
+        mock_strava_client.iter_activity_pages.return_value = [[{'id': 1}], [{'id': 2}]]
+
+        # Execute
+        sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
+
+        # Verify
+        mock_db.mark_athlete_synced.assert_called_once_with(athlete_id)
+
+    def test_sync_athlete_activities_not_marked_synced_when_a_page_fails(
+        self, sync_service, mock_db, mock_strava_client
+    ):
+        """Test that a failure after the first page leaves last_sync untouched."""
+        # Setup: First page arrives, fetching the second one fails
+        athlete_id = '12345'
+        mock_db.get_sync_context.return_value = (True, datetime(2025, 10, 10))
+        mock_db.save_activities.return_value = 1
+
+        def pages(after):
+            yield [{'id': 1}]
+            raise Exception("Strava unavailable")
+
+        mock_strava_client.iter_activity_pages.side_effect = pages
+
+        # Execute
+        result = sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
+
+        # Verify
+        assert result['synced'] is False
+        assert 'Strava unavailable' in result['error']
+        mock_db.save_activities.assert_called_once_with(athlete_id, [{'id': 1}])
+        mock_db.mark_athlete_synced.assert_not_called()
+
     def test_sync_athlete_activities_when_sync_not_needed(
         self, sync_service, mock_db, mock_strava_client
     ):
         """Test sync skipped when data is fresh."""
         # Setup
         athlete_id = '12345'
-        mock_db.needs_sync.return_value = False
-        mock_db.get_activities.return_value = ['existing_activity']
+        mock_db.get_sync_context.return_value = (False, None)
+        mock_db.count_activities.return_value = 1
 
         # Execute
         result = sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
 
         # Verify
-        assert result['athlete_id'] == athlete_id
         assert result['synced'] is False
-        assert result['new_activities'] == 0
         assert result['total_activities'] == 1
-        assert result['error'] is None
         assert 'Sync not needed' in result['message']
 
         # Verify Strava API was NOT called
-        mock_strava_client.get_all_activities.assert_not_called()
+        mock_strava_client.iter_activity_pages.assert_not_called()
 
     def test_sync_athlete_activities_handles_exceptions(
         self, sync_service, mock_db, mock_strava_client
@@ -187,8 +261,7 @@ class TestActivitySyncService:
         """Test that exceptions during sync are captured in result."""
         # Setup
         athlete_id = '12345'
-        mock_db.needs_sync.return_value = True
-        mock_db.get_latest_activity_date.side_effect = Exception("Database error")
+        mock_db.get_sync_context.side_effect = Exception("Database error")
 
         # Execute
         result = sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
@@ -205,10 +278,9 @@ class TestActivitySyncService:
         """Test that OAuth tokens are saved to database after successful sync."""
         # Setup
         athlete_id = '12345'
-        mock_db.needs_sync.return_value = True
-        mock_db.get_latest_activity_date.return_value = datetime(2025, 10, 10)
+        mock_db.get_sync_context.return_value = (True, datetime(2025, 10, 10))
         mock_db.save_activities.return_value = 3
-        mock_db.get_activities.return_value = ['act1', 'act2', 'act3']
+        mock_db.count_activities.return_value = 3
 
         # Execute
         sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
@@ -244,43 +316,56 @@ class TestActivitySyncService:
         stored_tokens = {
             'access_token': 'stored_access_token',
             'refresh_token': 'stored_refresh_token',
-            'expires_at': int((datetime.now() + timedelta(hours=6)).timestamp())
+            'expires_at': EXPIRES_AT,
         }
         mock_db.get_athlete_tokens.return_value = stored_tokens
-        mock_db.needs_sync.return_value = False
-        mock_db.get_activities.return_value = []
+        mock_db.get_sync_context.return_value = (False, None)
+        mock_db.count_activities.return_value = 0
 
         # Execute
         result = sync_service.sync_athlete_with_stored_tokens(athlete_id)
 
-        # Verify tokens were loaded
+        # Verify tokens were loaded and used for the sync
         mock_db.get_athlete_tokens.assert_called_once_with(athlete_id)
-
-        # Verify result structure
-        assert result['athlete_id'] == athlete_id
-        assert 'synced' in result
+        assert result['error'] is None
 
     # ===== Result Structure Tests =====
 
-    def test_sync_result_has_all_required_fields(self, sync_service, mock_db, mock_strava_client):
-        """Test that sync result always contains required fields."""
+    @pytest.mark.parametrize(
+        'sync_context, new_activities, total_activities',
+        [
+            ((True, datetime(2025, 10, 10)), 5, 5),
+            ((True, None), 0, 0),
+            ((False, None), 0, 3),
+        ],
+        ids=['synced', 'first_sync_nothing_new', 'sync_not_needed'],
+    )
+    def test_sync_result_has_all_required_fields(
+        self,
+        sync_service,
+        mock_db,
+        mock_strava_client,
+        sync_context,
+        new_activities,
+        total_activities,
+    ):
+        """Test that sync result always contains required fields of the right type."""
         # Setup
-        athlete_id = '12345'
-        mock_db.needs_sync.return_value = False
-        mock_db.get_activities.return_value = []
+        mock_db.get_sync_context.return_value = sync_context
+        mock_db.save_activities.return_value = new_activities
+        mock_db.count_activities.return_value = total_activities
+        if new_activities:
+            mock_strava_client.iter_activity_pages.return_value = [
+                [{'id': i} for i in range(new_activities)]
+            ]
 
         # Execute
-        result = sync_service.sync_athlete_activities(athlete_id, mock_strava_client)
+        result = sync_service.sync_athlete_activities('12345', mock_strava_client)
 
-        # Verify all required fields exist
-        assert 'athlete_id' in result
-        assert 'synced' in result
-        assert 'new_activities' in result
-        assert 'total_activities' in result
-        assert 'error' in result
-
-        # Verify types
-        assert isinstance(result['athlete_id'], str)
-        assert isinstance(result['synced'], bool)
-        assert isinstance(result['new_activities'], int)
-        assert isinstance(result['total_activities'], int)
+        # Verify
+        for field, expected_type in RESULT_SCHEMA.items():
+            assert isinstance(result[field], expected_type), field
+        assert result['athlete_id'] == '12345'
+        assert result['new_activities'] == new_activities
+        assert result['total_activities'] == total_activities
+        assert result['error'] is None